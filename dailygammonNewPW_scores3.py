@@ -20,7 +20,8 @@ Usage:
         Provide the league as the first argument and optionally '--auto' as the second.
         Example: python dailygammon.py 2b --auto
         -> Processes league "2b"
-        -> Closes Excel workbook automatically (needed when running multiple leagues in sequence)
+        -> Saves the workbook straight back to the Excel file, without the Streamlit
+           download step (needed when running multiple leagues in sequence)
 
 This makes it possible to run the script across multiple leagues 
 without changing the source code manually.
@@ -47,7 +48,14 @@ Core Concepts:
 
 3. Caching
    - Each match_id is requested from DG at most once.
-   - A simple dict (`html_cache`) maps { match_id -> html } to reduce load.
+   - A simple dict (`match_cache`) maps { match_id -> MatchScore } to reduce load.
+   - Each page is parsed once right after download; all later steps share the
+     extracted names and scores instead of the page itself.
+   - The extracted scores are also stored on disk (`dg_match_cache.sqlite`), so a
+     re-run only downloads pages it has not seen yet. Entries of unfinished matches
+     expire after one hour; entries of finished matches are kept.
+   - If that file cannot be opened or written (read-only or locked location),
+     the scores are kept in memory for the current run only.
 
 4. Idempotence
    - Running the script multiple times does not duplicate work.
@@ -58,9 +66,13 @@ Core Concepts:
    - For each resolved match, the correct Excel row and columns are located
      via player/opponent name mapping.
    - Exact (case-insensitive) name matches are preferred.
-   - If no exact match is found, a heuristic rule is applied:
-       * Check whether one name appears as a substring of the other.
-   - If the heuristic is inconclusive, the match is skipped for safety.
+   - If no exact match is found, the Excel player is fuzzy matched against
+     both DG names (rapidfuzz token-set ratio):
+       * The best name must score at least NAME_MATCH_MIN_SCORE (0-100) and
+         lead the other name by at least NAME_MATCH_MIN_MARGIN points.
+   - Otherwise the match is skipped for safety. Names that only share a
+     prefix are skipped too (e.g. "Alex" vs "Alexander" scores about 62),
+     where the old substring rule used to accept them.
 
 6. Safety Rules
    - The script never overwrites an existing score of 11.
@@ -85,9 +97,11 @@ Core Concepts:
 #   6. For finished matches, set the final winner score to 11
 #
 # Excel file requirement:
-# - Requires Excel file "<season>th_Backgammon-championships_<league>.xlsm"
-#   The corresponding Excel file (e.g. "34th_Backgammon-championships_4d.xlsm")
+# - Requires Excel file "<season>th_Backgammon-championships_<league>.xlsx"
+#   The corresponding Excel file (e.g. "34th_Backgammon-championships_4d.xlsx")
 #   must be located in the same folder as this script.
+# - The workbook is loaded once per run with openpyxl (no Excel application is
+#   started or attached to) and saved once at the end.
 #
 # - Excel sheets used:
 #       * "Players" → base player list
@@ -101,28 +115,75 @@ Core Concepts:
 #   - League (variable: liga, e.g. "4d")
 #
 # Required Python libraries:
-#   requests, beautifulsoup4, xlwings
+#   requests, lxml, selectolax, rapidfuzz, openpyxl, python-dotenv, streamlit
 #
 # If not installed, run:
-#   pip install requests beautifulsoup4 xlwings
+#   pip install -r requirements.txt
 #
 # ============================================================
 # ============================================================
-# Streamlit-ready Script 1 (OpenPyXL / Pandas, secure login)
+# Streamlit-ready Script 1 (OpenPyXL, secure login)
 # ============================================================
 
 import os
 import sys
 import re
+import html as html_lib
+import time
+import sqlite3
+import json
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
+from selectolax.lexbor import LexborHTMLParser
+from rapidfuzz import fuzz, process
 import openpyxl
-import pandas as pd
 from dotenv import load_dotenv
 from datetime import datetime
 import streamlit as st
 import io
 
+# -----------------------------------------------------
+# XPath expressions (compiled once, used for every page/row)
+# - User pages are parsed with lxml directly: the compiled XPaths select rows and
+#   links inside libxml2, no BeautifulSoup tree is built.
+# - User pages: rows mentioning the season ($s), and the first link of each kind in a row.
+# - Match list pages (one per match, the hottest parse) use selectolax instead,
+#   see extract_latest_score().
+# -----------------------------------------------------
+SEASON_ROWS_XPATH = etree.XPath("//tr[contains(string(.), $s)]")
+USER_LINK_XPATH = etree.XPath('(.//a[contains(@href, "/bg/user/")])[1]')
+GAME_LINK_XPATH = etree.XPath('(.//a[contains(@href, "/bg/game/") and contains(@href, "/0/")])[1]')
+
+# -----------------------------------------------------
+# Regular expressions (compiled once, used for every page/row)
+# - Link IDs need no regex: DG hrefs are canonical, see link_id().
+# -----------------------------------------------------
+SCORE_RE = re.compile(r"(.+?)\s*:\s*(\d+)")  # "<Name> : <Score>"
+ROW_END_RE = re.compile(r"</tr\s*>", re.I)    # user page pre-filter: split the page into rows
+ROW_START_RE = re.compile(r"<tr\b", re.I)      # score fast path: rows after the last hit
+# Score row fast path: two adjacent cells "<Name> : <Score>" (name optionally inside a link)
+SCORE_CELLS_RE = re.compile(
+    r"<td[^>]*>\s*(?:<a[^>]*>)?([^<:]+?)(?:</a>)?\s*:\s*(\d+)\s*</td>\s*"
+    r"<td[^>]*>\s*(?:<a[^>]*>)?([^<:]+?)(?:</a>)?\s*:\s*(\d+)\s*</td>"
+)
+# Export pages (plain text, one line each): "<Left> : <Score>   <Right> : <Score>" and "... Wins ... and the match"
+EXPORT_PLAYERS_RE = re.compile(r"^[ \t]*(.+?)[ \t]*:[ \t]*\d+[ \t]+(.+?)[ \t]*:[ \t]*\d+[ \t]*\r?$", re.M)
+EXPORT_WINS_RE = re.compile(r"^(.*?)Wins\b.*and the match", re.M)
+
+# Latest score row of a DG match page, in DG order (left/right as shown on the page)
+MatchScore = namedtuple("MatchScore", "left_name right_name left_score right_score")
+
+# Fuzzy name fallback: minimum token-set ratio for a DG name to count as the
+# Excel player, and the lead it needs over the other DG name (else: ambiguous)
+NAME_MATCH_MIN_SCORE = 90
+NAME_MATCH_MIN_MARGIN = 10
+
 def main():
     # -----------------------------
     # Load credentials from .env
@@ -153,6 +214,10 @@ def main():
     }
     
     BASE_URL = "http://dailygammon.com/bg/game/{}/0/list"
+    MAX_CONCURRENT_FETCHES = 16  # worker threads for parallel page requests (<= adapter pool size)
+    CACHE_FILE = "dg_match_cache.sqlite"  # on-disk score cache (SQLite), kept between runs
+    CACHE_TTL = 3600  # seconds until the page of an unfinished match is fetched again
+    COOKIE_JAR = "dg_cookies.json"  # DG session cookies (name -> value), reused by the next run
     
     # -----------------------------
     # Season & League Selection
@@ -177,6 +242,7 @@ def main():
     # -----------------------------
     # Read players from Excel
     # -----------------------------
+    # - Loaded once, writable: the same workbook object is modified and saved at the end.
     wb_xw = openpyxl.load_workbook(file)
     ws_players = wb_xw["Players"]
 
@@ -195,15 +261,68 @@ def main():
     # -----------------------------
     # Secure login session
     # -----------------------------
+    # - One session is used for every DG request of the run.
+    # - The mounted adapter keeps connections alive per host (dailygammon.com and
+    #   www.dailygammon.com) and retries transient connection errors as well as
+    #   rate-limit/server error answers (429, 5xx) with an increasing pause.
+    # - requests already asks for gzip/deflate pages and keeps connections alive by default.
+    # - pool_maxsize >= MAX_CONCURRENT_FETCHES, so every worker thread gets a kept-alive connection.
+    # - The cookies of the last login are kept in COOKIE_JAR (plain JSON) and loaded without any
+    #   check request; only without a (readable) jar do we log in right away.
+    # - Expired cookies show up as a "Please Login" page on a user, match or export page: relogin()
+    #   then logs in once for the whole run and the page is requested again.
+    login_lock = threading.Lock()  # worker threads may hit "Please Login" at the same time
+    login_state = {"from_jar": False, "relogged": None}  # relogged: None = not tried, else success
+
+    def login(s: requests.Session):
+        resp = s.post(login_url, data=payload, timeout=30)
+        resp.raise_for_status()
+        try:
+            with open(COOKIE_JAR, "w", encoding="utf-8") as f:
+                json.dump(requests.utils.dict_from_cookiejar(s.cookies), f)
+        except OSError:
+            pass  # read-only location: just log in again next run
+
     def login_session() -> requests.Session:
         s = requests.Session()
         s.headers.update({"User-Agent": "Mozilla/5.0"})
-        resp = s.post(login_url, data=payload, timeout=30)
-        resp.raise_for_status()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=32, max_retries=retry)
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+
+        try:
+            with open(COOKIE_JAR, encoding="utf-8") as f:
+                s.cookies.update(requests.utils.cookiejar_from_dict(dict(json.load(f))))
+            login_state["from_jar"] = True
+        except (OSError, ValueError, TypeError):  # no jar yet or unreadable jar
+            login(s)
         return s
 
+    def relogin(s: requests.Session) -> bool:
+        # True if the page that asked for a login is worth requesting again
+        with login_lock:
+            if not login_state["from_jar"]:
+                return False  # a fresh login was rejected: retrying would not help
+            if login_state["relogged"] is None:
+                s.cookies.clear()
+                try:
+                    login(s)
+                    login_state["relogged"] = True
+                except requests.RequestException:
+                    login_state["relogged"] = False
+            return login_state["relogged"]
+
     session = login_session()
 
+    # PAGE DECODING:
+    # - Every DG page is read as bytes and decoded once with the charset from its Content-Type.
+    # - Without a declared charset the page is decoded as utf-8 (requests would assume
+    #   ISO-8859-1 for text/* and garble non-ASCII player names).
+    def page_text(resp: requests.Response) -> str:
+        declared = "charset=" in resp.headers.get("Content-Type", "").lower()
+        return resp.content.decode(resp.encoding if declared else "utf-8", errors="replace")
+
 
     # -----------------------------------------------------
     # --- Collect matches per player ---
@@ -219,25 +338,48 @@ def main():
     #     - Match ID
     #
     # - Filters table rows by the 'season' string to avoid pulling old matches.
+    # - season_rows(): the page is decoded with page_text() (declared charset, else utf-8).
+    #   The page is first cut at every "</tr>"; only chunks that mention the season are kept
+    #   (from their last "<tr" on) and parsed, older seasons are usually most of the page.
+    #   The XPath then re-checks the season in the row text (contains(string(.), $s) runs in
+    #   libxml2, no text is built in Python for the rows it rejects).
     # -----------------------------------------------------
 
+    def season_rows(r: requests.Response, season):
+        page = page_text(r)
+        fragments = []
+        for chunk in ROW_END_RE.split(page):
+            if season in chunk:
+                start = chunk.lower().rfind("<tr")
+                if start != -1:
+                    fragments.append(chunk[start:] + "</tr>")
+        if not fragments:
+            return []
+        tree = lxml.html.fromstring("<table>" + "".join(fragments) + "</table>")
+        return SEASON_ROWS_XPATH(tree, s=season)
+
+    def link_id(links, prefix):
+        # First link found by a *_LINK_XPATH -> (link element, ID) or (None, None)
+        # - DG hrefs are canonical ("/bg/user/<id>", "/bg/game/<id>/0/"):
+        #   the ID is the path segment right after the prefix, plain string slicing is enough.
+        if not links:
+            return None, None
+        found = links[0].get("href", "").partition(prefix)[2].split("/", 1)[0]
+        return (links[0], found) if found.isdigit() else (None, None)
+
     def get_player_matches(session: requests.Session, player_id, season):
         url = f"http://www.dailygammon.com/bg/user/{player_id}"
         r = session.get(url)
+        if b"Please Login" in r.content and relogin(session):
+            r = session.get(url)
         r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
         player_matches = []
-        for row in soup.find_all("tr"):
-            text = row.get_text(" ", strip=True)
-            if season not in text:
-                continue
-            opponent_link = row.find("a", href=re.compile(r"/bg/user/\d+"))
-            match_link = row.find("a", href=re.compile(r"/bg/game/\d+/0/"))
-            if not opponent_link or not match_link:
+        for row in season_rows(r, season):
+            opponent_link, opponent_id = link_id(USER_LINK_XPATH(row), "/bg/user/")
+            _, match_id = link_id(GAME_LINK_XPATH(row), "/bg/game/")
+            if opponent_link is None or match_id is None:
                 continue
-            opponent_name = opponent_link.text.strip()
-            opponent_id = re.search(r"/bg/user/(\d+)", opponent_link["href"]).group(1)
-            match_id = re.search(r"/bg/game/(\d+)/0/", match_link["href"]).group(1)
+            opponent_name = opponent_link.text_content().strip()
             player_matches.append((opponent_name, opponent_id, match_id))
         return player_matches
 
@@ -245,50 +387,184 @@ def main():
     # --- Helper functions: fetch HTML & extract scores ---
     # -----------------------------------------------------
     # -----------------------------------------------------
-    # Function: fetch_list_html
+    # Function: fetch_list_html / prefetch_match_scores
     # Purpose:
-    #   Downloads the HTML page for a specific match ID.
+    #   fetch_list_html downloads the HTML page for a specific match ID.
     #   Returns the HTML content or None if the request failed.
+    #   prefetch_match_scores downloads the pages for many match IDs concurrently,
+    #   parses each one once and stores the latest score (MatchScore) in match_cache
+    #   (None if the request failed or no score row was found).
+    #   Matches still fresh in the on-disk cache (store_get) are not downloaded again.
+    #
+    # CONCURRENT FETCHING:
+    # - Each page is a pure network wait, so the requests run in a thread pool
+    #   instead of one after another (requests releases the GIL while waiting).
+    # - All threads share the logged-in session and its connection pool.
+    # - MAX_CONCURRENT_FETCHES caps the number of parallel requests to stay gentle on DG.
+    # - The body is decoded once by page_text() (declared charset, else utf-8),
+    #   so no encoding detection runs on the page.
+    # - Parsing and cache writes stay on the main thread.
+    # - Used for match list pages (Phase 1 / Step 1), user pages (Step 2)
+    #   and export pages (Step 3).
     # -----------------------------------------------------
 
+    def fetch_concurrently(fetch, keys: list) -> list:
+        # fetch(key) for every key in the thread pool; results in the order of 'keys'
+        if not keys:
+            return []
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_FETCHES) as ex:
+            return list(ex.map(fetch, keys))
+
+    def fetch_export_text(session: requests.Session, match_id: int) -> str | None:
+        url = f"http://www.dailygammon.com/bg/export/{match_id}"
+        try:
+            resp = session.get(url, timeout=30)
+            text = page_text(resp)
+            if "Please Login" in text and relogin(session):
+                resp = session.get(url, timeout=30)
+                text = page_text(resp)
+            if "Please Login" in text:
+                return None
+            return text
+        except requests.RequestException:
+            return None
+
     def fetch_list_html(session: requests.Session, match_id: int) -> str | None:
         url = BASE_URL.format(match_id)
         try:
             resp = session.get(url, timeout=30)
-            if not resp.ok or "Please Login" in resp.text:
+            html = page_text(resp)
+            if "Please Login" in html and relogin(session):
+                resp = session.get(url, timeout=30)
+                html = page_text(resp)
+            if not resp.ok or "Please Login" in html:
                 return None
-            return resp.text
+            return html
         except requests.RequestException:
             return None
 
+    # SCORE STORE (SQLITE):
+    # - One key/value table: str(match_id) -> {fetched_at, score, finished} and
+    #   "winner/<match_id>" -> winner_name, values stored as JSON.
+    # - SQLite serialises writers across processes and threads, so parallel Streamlit
+    #   sessions can share the file; every write commits right away (WAL journal).
+    # - Values are also kept in 'stored' (this run). Without a usable file
+    #   (score_db is None or a write fails) the run goes on with that dict alone.
+
+    def open_score_store() -> sqlite3.Connection | None:
+        db = None
+        try:
+            db = sqlite3.connect(CACHE_FILE, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")  # a cache: no fsync per commit
+            with db:
+                db.execute("CREATE TABLE IF NOT EXISTS store (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            return db
+        except sqlite3.Error as e:
+            if db is not None:
+                db.close()
+            print(f"⚠️ Score cache {CACHE_FILE} not usable ({e}), keeping scores in memory for this run")
+            return None
+
+    def store_get(key: str, default=None):
+        if key in stored or score_db is None:
+            return stored.get(key, default)
+        try:
+            row = score_db.execute("SELECT value FROM store WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return default
+        return json.loads(row[0]) if row else default
+
+    def store_put(key: str, value):
+        stored[key] = value
+        if score_db is None:
+            return
+        try:
+            with score_db:
+                score_db.execute("INSERT OR REPLACE INTO store (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+        except sqlite3.Error:
+            pass  # read-only or locked file: kept in memory for this run
+
+    def load_stored_entry(match_id: int) -> dict | None:
+        entry = store_get(str(match_id))
+        if entry and (entry["finished"] or time.time() - entry["fetched_at"] < CACHE_TTL):
+            return entry
+        return None
+
+    def prefetch_match_scores(session: requests.Session, match_ids: list[int], refresh=frozenset()):
+        # refresh: match ids whose stored entry must not be used, even within CACHE_TTL
+        to_fetch = []
+        for mid in dict.fromkeys(match_ids):  # drop duplicates, keep order
+            entry = None if mid in refresh else load_stored_entry(mid)
+            if entry:
+                match_cache[mid] = MatchScore(*entry["score"]) if entry["score"] else None
+            else:
+                to_fetch.append(mid)
+        results = fetch_concurrently(lambda mid: fetch_list_html(session, mid), to_fetch)
+        for mid, html in zip(to_fetch, results):
+            if not html:
+                match_cache[mid] = None
+                continue
+            score = scan_latest_score(html, known_names) or extract_latest_score(LexborHTMLParser(html), known_names)
+            # stored as a plain list (JSON) so the store does not depend on this module's class
+            store_put(str(mid), {"fetched_at": time.time(), "score": list(score) if score else None, "finished": False})
+            match_cache[mid] = score
+            fetched_this_run.add(mid)
+
     # -----------------------------------------------------
     # Function: extract_latest_score
     # Purpose:
-    #   Parses the match HTML page and extracts the latest
+    #   Takes the parsed match page (selectolax/Lexbor tree) and extracts the latest
     #   visible score row for the two players.
-    #   Returns player names + current scores.
+    #   Returns player names + current scores as a MatchScore.
     #
     # PARSE LATEST SCORE FROM MATCH PAGE:
     # - Scans table rows from bottom to top (reversed) to find the most recent score line.
     # - Assumes the pattern "<Name> : <Score>" is present on both left and right columns.
+    # - node_text() joins the stripped text pieces with " " (same as get_text(" ", strip=True)).
+    #   selectolax keeps empty pieces, so the pieces are split on "\x00" and empty ones dropped.
     # -----------------------------------------------------
 
-    def extract_latest_score(html: str, players_list: list[str]):
-        soup = BeautifulSoup(html, "html.parser")
-        for row in reversed(soup.find_all("tr")):
-            text = row.get_text(" ", strip=True)
+    # FAST PATH (NO HTML PARSE):
+    # - scan_latest_score() runs SCORE_CELLS_RE over the raw page and takes the last cell pair
+    #   that names a known player. Score rows on DG pages are regular, so this usually hits.
+    # - The hit is only trusted if no later row names a known player: such a row may be a newer
+    #   score with markup the pattern does not expect (e.g. <b> or <span> inside a cell).
+    # - Otherwise (or without any hit) it returns None and the full parse below is used.
+
+    def scan_latest_score(page: str, players_list: list[str]):
+        latest, end = None, 0
+        for m in SCORE_CELLS_RE.finditer(page):
+            left_name = html_lib.unescape(m.group(1)).strip()
+            right_name = html_lib.unescape(m.group(3)).strip()
+            if any(p in left_name or p in right_name for p in players_list):
+                latest = MatchScore(left_name, right_name, int(m.group(2)), int(m.group(4)))
+                end = m.end()
+        if latest is None:
+            return None
+        for row in ROW_START_RE.split(page[end:])[1:]:
+            if any(p in row for p in players_list):
+                return None
+        return latest
+
+    def node_text(node) -> str:
+        return " ".join(t for t in node.text(separator="\x00", strip=True).split("\x00") if t)
+
+    def extract_latest_score(tree: LexborHTMLParser, players_list: list[str]):
+        for row in reversed(tree.css("tr")):
+            text = node_text(row)
             if not any(p in text for p in players_list):
                 continue
-            cells = row.find_all("td")
+            cells = row.css("td")
             if len(cells) >= 3:
-                left_text = cells[1].get_text(" ", strip=True)
-                right_text = cells[2].get_text(" ", strip=True)
-                left_match = re.match(r"(.+?)\s*:\s*(\d+)", left_text)
-                right_match = re.match(r"(.+?)\s*:\s*(\d+)", right_text)
+                left_text = node_text(cells[1])
+                right_text = node_text(cells[2])
+                left_match = SCORE_RE.match(left_text)
+                right_match = SCORE_RE.match(right_text)
                 if left_match and right_match:
                     left_name, left_score = left_match.groups()
                     right_name, right_score = right_match.groups()
-                    return left_name.strip(), right_name.strip(), int(left_score), int(right_score)
+                    return MatchScore(left_name.strip(), right_name.strip(), int(left_score), int(right_score))
         return None
 
     # -----------------------------------------------------
@@ -303,15 +579,15 @@ def main():
     # - 'switched_flag=True' means the match was manually entered with reversed order
     #   (excel_player appears on the right on DailyGammon), so we swap scores here.
     # - If names match exactly (case-insensitive), we map directly; otherwise we use a
-    #   small heuristic (substring check) as a fallback. If unsure, return None (skip write).
+    #   fuzzy match (rapidfuzz token-set ratio) as a fallback. If unsure, return None (skip write).
     # -----------------------------------------------------
 
 
     def map_scores_for_excel(player, opponent, left_name, right_name, left_score, right_score, switched_flag):
         ln = left_name.strip().lower()
         rn = right_name.strip().lower()
-        pn = player.strip().lower()
-        on = opponent.strip().lower()
+        pn = lower_name(player)
+        on = lower_name(opponent)
 
         if switched_flag:
             return right_score, left_score
@@ -321,62 +597,126 @@ def main():
         if ln == on and rn == pn:
             return right_score, left_score
 
-        # Fallback heuristic if names differ slightly
-        if pn in ln or pn in rn or on in ln or on in rn:
-            if pn in ln:
-                return left_score, right_score
-            if pn in rn:
-                return right_score, left_score
-        return None
+        # Fallback if names differ slightly: fuzzy match the Excel player against both DG names
+        # - accepted only with a high score and a clear lead over the other name (no guessing)
+        (best, score, idx), (_, runner_up, _) = process.extract(
+            pn, (ln, rn), scorer=fuzz.token_set_ratio, processor=None, limit=2
+        )
+        if score < NAME_MATCH_MIN_SCORE or score - runner_up < NAME_MATCH_MIN_MARGIN:
+            return None
+        return (left_score, right_score) if idx == 0 else (right_score, left_score)
 
     # -----------------------------------------------------
-    # --- Open Excel workbook via xlwings ---
+    # --- Excel workbook sheets (openpyxl) ---
     # -----------------------------------------------------
-    # EXCEL WRITING PHASE (XLWINGS):
-    # - From this point on, we interact with Excel via xlwings (live Excel instance).
+    # EXCEL WRITING PHASE (OPENPYXL):
+    # - From this point on, all reads/writes go to the in-memory openpyxl workbook.
+    # - There is no live Excel instance: writes trigger no recalculation or screen
+    #   repaint, so nothing needs to be suspended around the write phases.
+    #   Excel recalculates the formulas when the saved file is opened.
     # -----------------------------------------------------
 
     ws_links = wb_xw["Links"]
     ws_matches = wb_xw["Matches"]
 
+    # BULK READS:
+    # - Sheets that are scanned cell by cell are read once into a grid of values
+    #   (tuple of row tuples via iter_rows(values_only=True)) and parsed in Python.
+    # - grid_value() takes the same 1-based (row, column) as ws.cell().
+
+    def grid_value(grid, row, col):
+        try:
+            return grid[row - 1][col - 1]
+        except IndexError:
+            return None
+
     # Extract players/columns from "Links"
     # "LINKS" SHEET LAYOUT ASSUMPTION:
     # - Column A (from row 2 down) lists row player names.
     # - Row 1 (from column B rightwards) lists opponent names (as columns).
     # - Cells at (row_player, col_opponent) hold the match ID (and hyperlink).
+    # - Names are read with one iter_rows sweep each, up to the first empty cell.
 
     row_players_links = []
-    r = 2
-    while (v := ws_links[f"A{r}"].value):
+    for (v,) in ws_links.iter_rows(min_row=2, max_col=1, values_only=True):
+        if not v:
+            break
         row_players_links.append(str(v).strip())
-        r += 1
 
     col_opponents_links = []
-    c = 2
-    while (v := ws_links.cell(row=1, column=c).value):
+    for v in next(ws_links.iter_rows(min_row=1, max_row=1, min_col=2, values_only=True), ()):
+        if not v:
+            break
         col_opponents_links.append(str(v).strip())
-        c += 1
 
     col_index_links = {name: 2 + i for i, name in enumerate(col_opponents_links)}
+    row_index_links = {name: 2 + i for i, name in enumerate(row_players_links)}
 
     print("DEBUG: row_players_links =", row_players_links)
     print("DEBUG: col_opponents_links =", col_opponents_links)
     print("DEBUG: col_index_links =", col_index_links)
 
+    # Extract players/columns from "Matches"
+    # "MATCHES" SHEET LAYOUT ASSUMPTION:
+    # - Column A (from row 4 down) lists player names.
+    # - Each opponent owns two columns starting at column B: player's score, opponent's score.
+    players_in_matches = []
+    for (nm,) in ws_matches.iter_rows(min_row=4, max_col=1, values_only=True):
+        if not nm:
+            break
+        players_in_matches.append(str(nm).strip())
+    col_start = 2
+    matches_grid = tuple(ws_matches.iter_rows(values_only=True))  # scores as found before this run
+
+    # Deterministische Zeilen-/Spaltenzuordnung für Matches
+    # (O(1) lookups for every write instead of players_in_matches.index)
+    row_index_matches = {name: i+4 for i, name in enumerate(players_in_matches)}
+    col_index_matches = {name: col_start + i*2 for i, name in enumerate(players_in_matches)}
+
+    # FINISHED MATCHES (EXCEL SIDE):
+    # - A pair of score cells that already holds an 11 is a final result.
+    # - Such matches are never written again, so their DG pages are not downloaded at all.
+
+    def finished_in_excel(excel_player, excel_opponent):
+        r_idx = row_index_matches.get(excel_player)
+        c_left = col_index_matches.get(excel_opponent)
+        if r_idx is None or c_left is None:
+            return False
+        return 11 in (grid_value(matches_grid, r_idx, c_left), grid_value(matches_grid, r_idx, c_left + 1))
+
+    # Every player name known from the workbook; used to find the score rows on DG match pages
+    known_names = list(dict.fromkeys(players + row_players_links + players_in_matches))
+
+    # Lowercased workbook names, computed once for all name comparisons
+    # (names from DG pages are not known up front; lower_name() handles them on the fly)
+    LOWER = {n: n.strip().lower() for n in known_names + col_opponents_links}
+
+    def lower_name(name: str) -> str:
+        return LOWER.get(name) or name.strip().lower()
+
 
     # create WS Match_flag&control
     if "match_flag" in wb_xw.sheetnames:
         ws_flag = wb_xw["match_flag"]
+        # Headers normally match "Links" from an earlier run: only differing cells are written
+        flag_header_grid = tuple(ws_flag.iter_rows(values_only=True))
+
+        # Row 1: Opponent names
+        for col_idx, opp_name in enumerate(col_opponents_links, start=2):
+            if grid_value(flag_header_grid, 1, col_idx) != opp_name:
+                ws_flag.cell(row=1, column=col_idx).value = opp_name
+
+        # Column A: Player names
+        for row_idx, player_name in enumerate(row_players_links, start=2):
+            if grid_value(flag_header_grid, row_idx, 1) != player_name:
+                ws_flag.cell(row=row_idx, column=1).value = player_name
     else:
         ws_flag = wb_xw.create_sheet("match_flag")
 
-    # Row 1: Opponent names
-    for col_idx, opp_name in enumerate(col_opponents_links, start=2):
-        ws_flag.cell(row=1, column=col_idx).value = opp_name
-
-    # Column A: Player names
-    for row_idx, player_name in enumerate(row_players_links, start=2):
-        ws_flag.cell(row=row_idx, column=1).value = player_name
+        # New (empty) sheet: header row and player column are appended row by row
+        ws_flag.append([None, *col_opponents_links])
+        for player_name in row_players_links:
+            ws_flag.append([player_name])
 
     if "control" in wb_xw.sheetnames:
         ws_control = wb_xw["control"]
@@ -398,75 +738,79 @@ def main():
     matches = {}
     matches_by_hand = {}
     match_id_to_excel = {}
-    html_cache = {}
+    match_cache = {}
     finished_by_id = {}
+    fetched_this_run = set()  # match ids whose page was downloaded in this run
+    stored = {}  # store values of this run (see store_get / store_put)
+    score_db = open_score_store()  # None: no usable cache file, closed on every way out of the run
+    try:
+        pending_match_writes = {}  # { (row, col) -> value } for "Matches", flushed once after Phase 2
 
 
-    #Skippimg Step 1 & 2 because matches are filled
-    print(f"DEBUG: ws_control['A1'] = {ws_control['A1'].value!r}")
-    print(f"DEBUG: skip_fetching = {skip_fetching}")
-    print(f"DEBUG: entering Step 1 & 2? {'Yes' if not skip_fetching else 'No'}")
+        #Skippimg Step 1 & 2 because matches are filled
+        print(f"DEBUG: ws_control['A1'] = {ws_control['A1'].value!r}")
+        print(f"DEBUG: skip_fetching = {skip_fetching}")
+        print(f"DEBUG: entering Step 1 & 2? {'Yes' if not skip_fetching else 'No'}")
 
-    if not skip_fetching:
+        if not skip_fetching:
 
 
-        # -----------------------------------------------------
-        # Step 1: Check existing links
-        # Purpose:
-        #   Go through the "Links" sheet and verify which matches
-        #   already have a match ID entered. If the IDs are present,
-        #   confirm whether the player/opponent order is correct.
-        #   Marks switched matches if detected.
-        # -----------------------------------------------------
+            # -----------------------------------------------------
+            # Step 1: Check existing links
+            # Purpose:
+            #   Go through the "Links" sheet and verify which matches
+            #   already have a match ID entered. If the IDs are present,
+            #   confirm whether the player/opponent order is correct.
+            #   Marks switched matches if detected.
+            # -----------------------------------------------------
 
-        for i, player_name in enumerate(row_players_links, start=2):
-            for opp in col_opponents_links:
-                if player_name == opp:
-                    continue
-                c = col_index_links.get(opp)
+            links_grid = tuple(ws_links.iter_rows(values_only=True))
+            flag_grid = tuple(ws_flag.iter_rows(values_only=True))
+
+            existing_links = []
+            for i, player_name in enumerate(row_players_links, start=2):
+                for opp in col_opponents_links:
+                    if player_name == opp:
+                        continue
+                    c = col_index_links.get(opp)
             
-                val = ws_links.cell(row=i, column=c).value
+                    val = grid_value(links_grid, i, c)
                 
 
-                if not val:
-                    continue
-                try:
-                    match_id = int(val)
-                except Exception:
-                    match_id = int(str(val).strip())
+                    if not val:
+                        continue
+                    try:
+                        match_id = int(val)
+                    except Exception:
+                        match_id = int(str(val).strip())
                 
-                # --- Check match_flag sheet to avoid refetching ---
-                row_idx_flag = row_players_links.index(player_name) + 2
-                col_idx_flag = col_index_links.get(opp)
-                flag_val = ws_flag.cell(row=row_idx_flag, column=col_idx_flag).value
-
-                if flag_val is None:
-                    # Match not yet processed: fetch from DG
-                    html_cache[match_id] = fetch_list_html(session, match_id)
-                else:
-                    # Already processed (0 or 1), skip fetching
-                    html_cache[match_id] = None
+                    # --- Check match_flag sheet to avoid refetching ---
+                    flag_val = grid_value(flag_grid, i, c)
 
-                html = html_cache[match_id]
-                if not html:
-                    matches[(player_name, opp)] = match_id
-                    match_id_to_excel[match_id] = (player_name, opp, False)
-                    continue        
-                score_info = extract_latest_score(html, [player_name, opp])
+                    # Match not yet processed (None): fetch from DG
+                    # Already processed (0 or 1) or already finished in Excel: skip fetching
+                    needs_fetch = flag_val is None and not finished_in_excel(player_name, opp)
+                    existing_links.append((player_name, opp, match_id, needs_fetch))
+
+            # Download all pages needed for the order check in one concurrent batch
+            prefetch_match_scores(session, [mid for _, _, mid, needs_fetch in existing_links if needs_fetch])
+
+            for player_name, opp, match_id, needs_fetch in existing_links:
+                score_info = match_cache.get(match_id) if needs_fetch else None
                 if not score_info:
                     matches[(player_name, opp)] = match_id
                     match_id_to_excel[match_id] = (player_name, opp, False)
                     continue
                 left_name, right_name, _, _ = score_info
                 ln = left_name.lower(); rn = right_name.lower()
-                pn = player_name.lower(); on = opp.lower()
+                pn = LOWER[player_name]; on = LOWER[opp]
                 if ln == pn and rn == on:
                     matches[(player_name, opp)] = match_id
                     match_id_to_excel[match_id] = (player_name, opp, False)
 
-        # MANUAL/SWITCHED CASE:
-        # - DailyGammon lists "opponent vs player", but Excel expects "player vs opponent".
-        # - We record 'switched=True' for this match_id so all later writes swap correctly.
+                # MANUAL/SWITCHED CASE:
+                # - DailyGammon lists "opponent vs player", but Excel expects "player vs opponent".
+                # - We record 'switched=True' for this match_id so all later writes swap correctly.
 
                 elif ln == on and rn == pn:
                     matches_by_hand[(player_name, opp)] = (match_id, True)
@@ -477,304 +821,305 @@ def main():
                     match_id_to_excel[match_id] = (player_name, opp, False)
                     print(f"⚠️ Unclear order for match ID {match_id}: DG shows '{left_name}' vs '{right_name}'")
 
+            # -----------------------------------------------------
+            # Step 2: Fill missing match IDs
+            # Purpose:
+            #   For each player, check which opponents still have no
+            #   match ID in the "Links" sheet. Search for the match on
+            #   DailyGammon and insert it automatically into the table.
+            #   Also detects "switched" matches (player/opponent reversed).
+            #
+            # STEP 2 RATIONALE:
+            # - For any missing (player, opponent) cell, we look up the player's page to find
+            #   their active matches for this season and backfill the match ID into "Links".
+            # - We also attach a hyperlink to the specific match list page for quick access.
+            # - Existing cells are left untouched; only empty cells get filled.
+            # -----------------------------------------------------
+
+
+            # - Only the player's own keys are added below, so the players with missing opponents
+            #   are known up front and all their pages are downloaded in one concurrent batch.
+            players_missing = [
+                player for player in players
+                if player_ids.get(player) and any(
+                    opp != player and (player, opp) not in matches and (player, opp) not in matches_by_hand
+                    for opp in players
+                )
+            ]
+            pages = fetch_concurrently(lambda p: get_player_matches(session, player_ids[p], season=season), players_missing)
+            for player, player_matches in zip(players_missing, pages):
+                for opponent_name, opponent_id, match_id in player_matches:
+                    key = (player, opponent_name)
+                    if key in matches or key in matches_by_hand:
+                        continue
+                    mid_int = int(match_id)
+                    switched_flag = False
+                    if mid_int in match_id_to_excel:
+                        _, _, switched_flag = match_id_to_excel[mid_int]
+                    matches[key] = mid_int
+                    match_id_to_excel[mid_int] = (player, opponent_name, switched_flag)
+                    row_idx = row_index_links.get(player)
+                    c = col_index_links.get(opponent_name)
+                    if not row_idx or not c or opponent_name == player:
+                        continue
+
+                    cell = ws_links.cell(row=row_idx, column=c)
+
+                    # --- match_flag sheet setzen ---
+                    # (match_flag uses the same row/column layout as "Links")
+                    ws_flag.cell(row=row_idx, column=c).value = 1 if switched_flag else 0
+
+
+            # - We only write if the cell is empty to avoid overwriting manual adjustments.
+            # - If you ever need to refresh a wrong ID, clear the cell first, then rerun.
+
+                    if not cell.value:
+                        cell.value = str(match_id)
+                        cell.hyperlink = f"http://www.dailygammon.com/bg/game/{match_id}/0/list#end"
+                        print(f"Detected missing match between {player} and {opponent_name} — match ID={match_id} has been auto-added to the table")
+
+            print("✅ Match IDs updated (auto + manual detection)")
+
+        else:
+            print("Skipping Step 1 & Step 2: using existing match IDs only.")
+
         # -----------------------------------------------------
-        # Step 2: Fill missing match IDs
+        # Step 3: Collect finished matches
         # Purpose:
-        #   For each player, check which opponents still have no
-        #   match ID in the "Links" sheet. Search for the match on
-        #   DailyGammon and insert it automatically into the table.
-        #   Also detects "switched" matches (player/opponent reversed).
+        #   For every match mapped to Excel, fetch its export page.
+        #   If the match is marked as finished, extract the winner.
+        #   Results are stored in a dictionary for later processing.
         #
-        # STEP 2 RATIONALE:
-        # - For any missing (player, opponent) cell, we look up the player's page to find
-        #   their active matches for this season and backfill the match ID into "Links".
-        # - We also attach a hyperlink to the specific match list page for quick access.
-        # - Existing cells are left untouched; only empty cells get filled.
+        # FINISHED MATCH DETECTION:
+        # - Only matches in 'match_id_to_excel' can be written, so their exports are fetched
+        #   directly (one concurrent batch); the per-player user pages are not needed here.
+        # - The first "<Left> : <Score>   <Right> : <Score>" line of the export gives the DG names.
+        # - The winner is inferred from the column the "Wins ... and the match" line is in.
+        # - 'finished_by_id' maps match_id -> winner_name (DG name) for later use in Phase 2.
+        # - A finished match never changes: its winner is kept in the store ("winner/<match_id>")
+        #   and its export is not downloaded again in later runs.
+        # - Matches already finished in Excel (11) are skipped: Phase 2 never writes them.
         # -----------------------------------------------------
 
+        # EXPORT PARSE (STRUCTURED):
+        # - The export is plain text in two fixed-width columns (left player | right player).
+        # - The header line tells where each column starts; "Wins" belongs to the left player if it
+        #   starts before the middle between both column starts, else to the right player.
+        #   (Replaces the fixed 'mid_threshold 24' character cutoff.)
+        # - Both regexes run once over the whole text, no per-line loop.
+
+        def export_winner(text: str) -> str | None:
+            header = EXPORT_PLAYERS_RE.search(text)
+            won = EXPORT_WINS_RE.search(text, header.end()) if header else None
+            if not won:
+                return None
+            middle = (header.start(1) + header.start(2)) / 2 - header.start()
+            return header.group(1) if len(won.group(1)) < middle else header.group(2)
+
+        for match_id in match_id_to_excel:
+            stored_winner = store_get(f"winner/{match_id}")
+            if stored_winner:
+                finished_by_id[match_id] = stored_winner
+
+        export_ids = [
+            mid for mid, (excel_player, excel_opponent, _) in match_id_to_excel.items()
+            if mid not in finished_by_id and not finished_in_excel(excel_player, excel_opponent)
+        ]
+        exports = fetch_concurrently(lambda mid: fetch_export_text(session, mid), export_ids)
+
+        for match_id, export_text in zip(export_ids, exports):
+            winner = export_winner(export_text) if export_text else None
+            if winner:
+                finished_by_id[match_id] = winner
+                store_put(f"winner/{match_id}", winner)
 
-        for player in players:
-            pid = player_ids.get(player)
-            if not pid:
-                continue
-            missing = [opp for opp in players if opp != player and (player, opp) not in matches and (player, opp) not in matches_by_hand]
-            if not missing:
+        # -----------------------------------------------------
+        # Phase 1: Write intermediate scores
+        # Purpose:
+        #   For each match, download the latest score and update
+        #   the "Matches" sheet in Excel.
+        #   IMPORTANT: If a score of 11 is already present,
+        #   the match is considered finished and will not be overwritten.
+        # -----------------------------------------------------
+        print(f"Total matches to process: {len(match_id_to_excel)}")
+        for mid, info in match_id_to_excel.items():
+            print(f"Match ID {mid}: Excel mapping: {info}, score cached? {'Yes' if match_cache.get(mid) else 'No'}")
+
+        print("🔎 Phase 1: Writing intermediate scores for matches...")
+
+        # EXCEL WRITE HELPER (INTERMEDIATE SCORES):
+        # - Translates (excel_player, excel_opponent) to row/column indices in "Matches".
+        # - For each opponent, we reserve two columns: left=excel_player's score, right=excel_opponent's score.
+        # - Safety: if either cell already equals 11, we skip to preserve final results.
+        # - Scores are already correctly oriented by 'map_scores_for_excel'; no swapping here.
+        # - Writes only go into 'pending_match_writes'; the sheet is touched once, after Phase 2.
+
+        def write_score_to_excel(excel_player, excel_opponent, player_score, opponent_score, switched_flag):
+            r_idx = row_index_matches.get(excel_player)
+            c_left = col_index_matches.get(excel_opponent)
+            if r_idx is None or c_left is None:
+                print(f"⚠️ Player not found in Excel sheet: {excel_player} vs {excel_opponent}")
+                return False
+            c_right = c_left + 1
+
+            # Do not overwrite already finished (11) scores!
+            # - Once a match is finished (11), intermediate updates must never overwrite that cell.
+
+            left_cell_val = grid_value(matches_grid, r_idx, c_left)
+            right_cell_val = grid_value(matches_grid, r_idx, c_right)
+            if left_cell_val == 11 or right_cell_val == 11:
+                return False
+
+            pending_match_writes[(r_idx, c_left)] = player_score
+            pending_match_writes[(r_idx, c_right)] = opponent_score
+
+            return True
+
+        # - Pull the score from cache if available; otherwise fetch fresh (all missing pages in one batch).
+        # - Matches already finished in Excel are not fetched; write_score_to_excel would refuse them anyway.
+        # - A stored score of a match that was still running when it was cached may predate its end:
+        #   matches finished by now are downloaded again unless their page was fetched in this run.
+
+        stale_finished = {
+            mid for mid in finished_by_id
+            if mid not in fetched_this_run and not store_get(str(mid), {"finished": True})["finished"]
+        }
+        for mid in stale_finished:
+            match_cache.pop(mid, None)
+
+        prefetch_match_scores(session, [
+            mid for mid, (excel_player, excel_opponent, _) in match_id_to_excel.items()
+            if match_cache.get(mid) is None and not finished_in_excel(excel_player, excel_opponent)
+        ], refresh=stale_finished)
+
+        for match_id, (excel_player, excel_opponent, switched_flag) in list(match_id_to_excel.items()):
+            result = match_cache.get(match_id)
+            if not result:
                 continue
-            player_matches = get_player_matches(session, pid, season=season)
-            for opponent_name, opponent_id, match_id in player_matches:
-                key = (player, opponent_name)
-                if key in matches or key in matches_by_hand:
-                    continue
-                mid_int = int(match_id)
-                switched_flag = False
-                if mid_int in match_id_to_excel:
-                    _, _, switched_flag = match_id_to_excel[mid_int]
-                matches[key] = mid_int
-                match_id_to_excel[mid_int] = (player, opponent_name, switched_flag)
-                try:
-                    row_idx = row_players_links.index(player) + 2
-                except ValueError:
-                    continue
-                c = col_index_links.get(opponent_name)
-                if not c or opponent_name == player:
-                    continue
-
-                cell = ws_links.cell(row=row_idx, column=c)
+            left_name, right_name, left_score, right_score = result
 
-                # --- match_flag sheet setzen ---
-                row_idx_flag = row_players_links.index(player) + 2
-                col_idx_flag = col_index_links.get(opponent_name)
-                ws_flag.cell(row=row_idx_flag, column=col_idx_flag).value = 1 if switched_flag else 0
+            # Map scores based on player names
 
+            mapped = map_scores_for_excel(excel_player, excel_opponent, left_name, right_name, left_score, right_score, switched_flag)
+            if mapped is None:
+                continue
+            excel_player_score, excel_opponent_score = mapped
+            write_score_to_excel(excel_player, excel_opponent, excel_player_score, excel_opponent_score, switched_flag)
 
-        # - We only write if the cell is empty to avoid overwriting manual adjustments.
-        # - If you ever need to refresh a wrong ID, clear the cell first, then rerun.
-
-                if not cell.value:
-                    cell.value = str(match_id)
-                    cell.hyperlink = f"http://www.dailygammon.com/bg/game/{match_id}/0/list#end"
-                    print(f"Detected missing match between {player} and {opponent_name} — match ID={match_id} has been auto-added to the table")
-
-        print("✅ Match IDs updated (auto + manual detection)")
-
-    else:
-        print("Skipping Step 1 & Step 2: using existing match IDs only.")
-
-    # -----------------------------------------------------
-    # Step 3: Collect finished matches
-    # Purpose:
-    #   For every player, fetch their export page.
-    #   If a match is marked as finished, extract the winner.
-    #   Results are stored in a dictionary for later processing.
-    #
-    # FINISHED MATCH DETECTION:
-    # - We open each player's page and follow "export" links for matches of this season.
-    # - The winner is inferred from a simple textual rule (position of "Wins" on the line).
-    # - 'finished_by_id' maps match_id -> winner_name for later use in Phase 2.
-    # -----------------------------------------------------
+        print("✅ Phase 1: completed")
+        # -----------------------------------------------------
+        # Phase 2: Final results - Set winners to 11 points
+        # Purpose:
+        #   For matches identified as finished, write the final
+        #   winner score (11 points) into the correct player cell
+        #   in the "Matches" sheet.
+        # -----------------------------------------------------
 
-    for player in players:
-        pid = player_ids.get(player)
-        if not pid:
-            continue
-        url = f"http://www.dailygammon.com/bg/user/{pid}"
-        try:
-            r = session.get(url, timeout=30)
-            r.raise_for_status()
-        except requests.RequestException:
-            continue
-        soup = BeautifulSoup(r.text, "html.parser")
-        for row in soup.find_all("tr"):
-            text = row.get_text(" ", strip=True)
-            if season not in text:
-                continue
-            export_link = row.find("a", href=re.compile(r"/bg/export/\d+"))
-            match_link = row.find("a", href=re.compile(r"/bg/game/\d+/0/"))
-            opponent_link = row.find("a", href=re.compile(r"/bg/user/\d+"))
-            if not export_link or not match_link or not opponent_link:
+        print("🔎 Phase 2: Final results (set winner = 11) ...")
+        for match_id, winner_name in finished_by_id.items():
+            # A finished match never changes again: keep its cached score without expiry
+            # (only a score downloaded in this run is known to be the final one)
+            entry = store_get(str(match_id))
+            if entry and not entry["finished"] and match_id in fetched_this_run:
+                entry["finished"] = True
+                store_put(str(match_id), entry)
+
+            info = match_id_to_excel.get(match_id)
+            if not info:
                 continue
-            try:
-                match_id = int(re.search(r"/bg/game/(\d+)/0/", match_link["href"]).group(1))
-            except Exception:
+            excel_player, excel_opponent, switched_flag = info
+            # Result already final in Excel (its page was not fetched, so the orientation may be unknown)
+            if finished_in_excel(excel_player, excel_opponent):
                 continue
-            opponent_name = opponent_link.text.strip()
-            export_url = f"http://www.dailygammon.com/bg/export/{match_id}"
-            try:
-                resp_export = session.get(export_url, timeout=30)
-                text_lines = resp_export.text.splitlines()
-            except requests.RequestException:
+            r_idx = row_index_matches.get(excel_player)
+            c_left = col_index_matches.get(excel_opponent)
+            if r_idx is None or c_left is None:
                 continue
-            winner = None
+            c_right = c_left + 1
 
-    # - 'mid_threshold 24' is a rough character-position cutoff to decide whether the "Wins"
-    #   belongs to the left or right player on the export line.
+            # Write 11 to the correct winner cell
+            # - winner_name is the DG name from the export, so no orientation (switched) handling is needed:
+            #   the Excel player's cell is c_left, the Excel opponent's cell is c_right.
 
-            mid_threshold = 24
-            for line in text_lines:
-                if "and the match" in line and "Wins" in line:
-                    pos = line.find("Wins")
-                    winner = player if pos < mid_threshold else opponent_name
-                    break
-            if winner:
-                finished_by_id[match_id] = winner
+            winner_lower = winner_name.strip().lower()
+            if winner_lower == lower_name(excel_player):
+                pending_match_writes[(r_idx, c_left)] = 11
 
-    # -----------------------------------------------------
-    # Phase 1: Write intermediate scores
-    # Purpose:
-    #   For each match, download the latest score and update
-    #   the "Matches" sheet in Excel.
-    #   IMPORTANT: If a score of 11 is already present,
-    #   the match is considered finished and will not be overwritten.
-    # -----------------------------------------------------
-    print(f"Total matches to process: {len(match_id_to_excel)}")
-    for mid, info in match_id_to_excel.items():
-        print(f"Match ID {mid}: Excel mapping: {info}, HTML fetched? {'Yes' if html_cache.get(mid) else 'No'}")
-
-    print("🔎 Phase 1: Writing intermediate scores for matches...")
-    players_in_matches = []
-    row_counter = 4
-    while True:
-        nm = ws_matches.cell(row=row_counter, column=1).value
-        if not nm:
-            break
-        players_in_matches.append(str(nm).strip())
-        row_counter += 1
-    col_start = 2
+            elif winner_lower == lower_name(excel_opponent):
+                pending_match_writes[(r_idx, c_right)] = 11
 
-    # Deterministische Zeilen-/Spaltenzuordnung für Matches
-    row_index_matches = {name: i+4 for i, name in enumerate(players_in_matches)}
-    col_index_matches = {name: col_start + i*2 for i, name in enumerate(players_in_matches)}
+        # FLUSH PENDING WRITES:
+        # - Phase 1 and Phase 2 may both target the same cell (score, then 11); only the last value counts.
+        # - Cells whose value did not change compared to the pre-run grid are not written at all.
+        changed = 0
+        for (r_idx, c_idx), value in pending_match_writes.items():
+            if grid_value(matches_grid, r_idx, c_idx) != value:
+                ws_matches.cell(row=r_idx, column=c_idx).value = value
+                changed += 1
+        print(f"✅ Phase 2: completed ({changed} cells changed in 'Matches')")
 
+        all_filled = True
 
-    # EXCEL WRITE HELPER (INTERMEDIATE SCORES):
-    # - Translates (excel_player, excel_opponent) to row/column indices in "Matches".
-    # - For each opponent, we reserve two columns: left=excel_player's score, right=excel_opponent's score.
-    # - Safety: if either cell already equals 11, we skip to preserve final results.
-    # - Scores are already correctly oriented by 'map_scores_for_excel'; no swapping here.
-
-    def write_score_to_excel(excel_player, excel_opponent, player_score, opponent_score, switched_flag):
-        try:
-            r_idx = players_in_matches.index(excel_player) + 4
-            c_base = players_in_matches.index(excel_opponent)
-        except ValueError:
-            print(f"⚠️ Player not found in Excel sheet: {excel_player} vs {excel_opponent}")
-            return False
-        c_left = col_start + c_base * 2
-        c_right = c_left + 1
-
-        # Do not overwrite already finished (11) scores!
-        # - Once a match is finished (11), intermediate updates must never overwrite that cell.
-
-        left_cell_val = ws_matches.cell(row=r_idx, column=c_left).value
-        right_cell_val = ws_matches.cell(row=r_idx, column=c_right).value
-        if left_cell_val == 11 or right_cell_val == 11:
-            return False
-
-        ws_matches.cell(row=r_idx, column=c_left).value = player_score
-        ws_matches.cell(row=r_idx, column=c_right).value = opponent_score
-
-        return True
-
-    # - Pull HTML from cache if available; otherwise fetch fresh.
-
-    for match_id, (excel_player, excel_opponent, switched_flag) in list(match_id_to_excel.items()):
-        html = html_cache.get(match_id)
-        if not html:
-            html = fetch_list_html(session, match_id)
-            html_cache[match_id] = html
-        if not html:
-            continue
-        result = extract_latest_score(html, players_in_matches)
-        if not result:
-            continue
-        left_name, right_name, left_score, right_score = result
-
-        # Map scores based on player names
-
-        mapped = map_scores_for_excel(excel_player, excel_opponent, left_name, right_name, left_score, right_score, switched_flag)
-        if mapped is None:
-            continue
-        excel_player_score, excel_opponent_score = mapped
-        write_score_to_excel(excel_player, excel_opponent, excel_player_score, excel_opponent_score, switched_flag)
-
-    print("✅ Phase 1: completed")
-    # -----------------------------------------------------
-    # Phase 2: Final results - Set winners to 11 points
-    # Purpose:
-    #   For matches identified as finished, write the final
-    #   winner score (11 points) into the correct player cell
-    #   in the "Matches" sheet.
-    # -----------------------------------------------------
-
-    print("🔎 Phase 2: Final results (set winner = 11) ...")
-    for match_id, winner_name in finished_by_id.items():
-        info = match_id_to_excel.get(match_id)
-        if not info:
-            continue
-        excel_player, excel_opponent, switched_flag = info
-        try:
-            r_idx = players_in_matches.index(excel_player) + 4
-            c_base = players_in_matches.index(excel_opponent)
-        except ValueError:
-            continue
-        c_left = col_start + c_base * 2
-        c_right = c_left + 1
-
-        # Write 11 to the correct winner cell
-
-        winner_lower = winner_name.strip().lower()
-        if switched_flag:
-            if winner_lower == excel_player.lower():
-                ws_matches.cell(row=r_idx, column=c_right).value = 11
-
-            elif winner_lower == excel_opponent.lower():
-                ws_matches.cell(row=r_idx, column=c_left).value = 11
-        else:
-            if winner_lower == excel_player.lower():
-                ws_matches.cell(row=r_idx, column=c_left).value = 11
-
-            elif winner_lower == excel_opponent.lower():
-                ws_matches.cell(row=r_idx, column=c_right).value = 11
-
-    all_filled = True
-
-    # Check Links sheet
-    for i, player_name in enumerate(row_players_links, start=2):
-        for opp in col_opponents_links:
-            if player_name == opp:
-                continue
-            c = col_index_links.get(opp)
-            if not ws_links.cell(row=i, column=c).value:
-                all_filled = False
+        # Check Links sheet
+        for i, player_name in enumerate(row_players_links, start=2):
+            for opp in col_opponents_links:
+                if player_name == opp:
+                    continue
+                c = col_index_links.get(opp)
+                if not ws_links.cell(row=i, column=c).value:
+                    all_filled = False
+                    break
+            if not all_filled:
                 break
-        if not all_filled:
-            break
-
-    # Or, equivalently, check match_flag 0/1 values
-    # for i in range(2, len(row_players_links)+2):
-    #     for j in range(2, len(col_opponents_links)+2):
-    #         val = ws_flag.cell(row=i, column=j).value
-    #         if val is None:
-    #             all_filled = False
-    #             break
-    #     if not all_filled:
-    #         break
-    if all_filled:
-        ws_control["A1"].value = "All match IDs filled"
-
-    #wb_xw.save(file)
-    # Close workbook automatically only if called from wrapper
-    #if AUTO_MODE:
-    #    wb_xw.close()
-
-    # ============================================================
-    # Optional: Persistenz im Streamlit-Cloud-Umfeld
-    # ============================================================
-    # -----------------------------
-    # Streamlit / Speicher Block
-    # -----------------------------
-    try:
-        # Excel-Workbook in Memory speichern
-        excel_bytes = io.BytesIO()
-        wb_xw.save(excel_bytes)   # Änderungen in BytesIO speichern
-        excel_bytes.seek(0)        # Pointer zurücksetzen
-
-        # Download-Button in Streamlit anzeigen
-        st.download_button(
-            label=f"📥 Geänderte Datei {file} herunterladen",
-            data=excel_bytes,
-            file_name=file,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-
-    except ImportError:
-        # Lokaler Run ohne Streamlit
-        wb_xw.save(file)
-        print(f"💾 Excel-Datei lokal gespeichert: {file}")
 
+        # Or, equivalently, check match_flag 0/1 values
+        # for i in range(2, len(row_players_links)+2):
+        #     for j in range(2, len(col_opponents_links)+2):
+        #         val = ws_flag.cell(row=i, column=j).value
+        #         if val is None:
+        #             all_filled = False
+        #             break
+        #     if not all_filled:
+        #         break
+        if all_filled:
+            ws_control["A1"].value = "All match IDs filled"
+
+        # ============================================================
+        # Optional: Persistenz im Streamlit-Cloud-Umfeld
+        # ============================================================
+        # -----------------------------
+        # Streamlit / Speicher Block
+        # -----------------------------
+        try:
+            if AUTO_MODE:
+                # Wrapper-Modus (headless): direkt in die Datei schreiben, kein Download-Button
+                wb_xw.save(file)
+                print(f"💾 Excel-Datei lokal gespeichert: {file}")
+            else:
+                # Excel-Workbook in Memory speichern
+                excel_bytes = io.BytesIO()
+                wb_xw.save(excel_bytes)   # Änderungen in BytesIO speichern
+                excel_bytes.seek(0)        # Pointer zurücksetzen
+
+                # Download-Button in Streamlit anzeigen
+                st.download_button(
+                    label=f"📥 Geänderte Datei {file} herunterladen",
+                    data=excel_bytes,
+                    file_name=file,
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+
+        except ImportError:
+            # Lokaler Run ohne Streamlit
+            wb_xw.save(file)
+            print(f"💾 Excel-Datei lokal gespeichert: {file}")
+
+        finally:
+            wb_xw.close()
+            print("🏁 Script finished successfully")
     finally:
-        wb_xw.close()
-        print("🏁 Script finished successfully")
+        if score_db is not None:
+            score_db.close()
 
 if __name__ == "__main__":
     main()